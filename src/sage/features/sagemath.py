@@ -12,9 +12,14 @@ Features for testing the presence of Python modules in the Sage library
 #                  https://www.gnu.org/licenses/
 # *****************************************************************************
 
+from functools import lru_cache
+
 from . import PythonModule, StaticFile
 from .join_feature import JoinFeature
-from .singular import sage__libs__singular
+
+# Value of sage.env.SAGE_DOC, fetched on first use so that this module can
+# be imported without sage.env
+_SAGE_DOC = None
 
 
 class sagemath_doc_html(StaticFile):
@@ -36,10 +41,13 @@ class sagemath_doc_html(StaticFile):
             sage: isinstance(sagemath_doc_html(), sagemath_doc_html)
             True
         """
-        from sage.env import SAGE_DOC
+        global _SAGE_DOC
+        if _SAGE_DOC is None:
+            from sage.env import SAGE_DOC
+            _SAGE_DOC = SAGE_DOC
         StaticFile.__init__(self, 'sagemath_doc_html',
                             filename='html',
-                            search_path=(SAGE_DOC,),
+                            search_path=(_SAGE_DOC,),
                             spkg='sagemath_doc_html')
 
 
@@ -241,6 +249,9 @@ class sage__rings__function_field(JoinFeature):
             sage: isinstance(sage__rings__function_field(), sage__rings__function_field)
             True
         """
+        # Import this lazily so that importing this module does not pull in
+        # the Singular feature graph.
+        from .singular import sage__libs__singular
         JoinFeature.__init__(self, 'sage.rings.function_field',
                              [PythonModule('sage.rings.function_field.function_field_polymod'),
                               sage__libs__singular()])
@@ -355,6 +366,37 @@ class sage__symbolic(JoinFeature):
                              spkg="sagemath_symbolics")
 
 
+@lru_cache(maxsize=1)
+def _all_features():
+    r"""
+    Construct the features corresponding to parts of the Sage library.
+
+    The result is cached so that repeated calls to :func:`all_features` do
+    not reconstruct the feature objects.
+
+    TESTS::
+
+        sage: from sage.features.sagemath import _all_features
+        sage: _all_features() is _all_features()
+        True
+    """
+    return (sagemath_doc_html(),
+            sage__combinat(),
+            sage__geometry__polyhedron(),
+            sage__graphs(),
+            sage__groups(),
+            sage__libs__pari(),
+            sage__modules(),
+            sage__plot(),
+            sage__rings__finite_rings(),
+            sage__rings__function_field(),
+            sage__rings__number_field(),
+            sage__rings__padics(),
+            sage__rings__real_double(),
+            sage__rings__real_mpfr(),
+            sage__symbolic())
+
+
 def all_features():
     r"""
     Return features corresponding to parts of the Sage library.
@@ -377,18 +419,41 @@ def all_features():
         sage: list(all_features())
         [...Feature('sage.combinat'), ...]
     """
-    return [sagemath_doc_html(),
-            sage__combinat(),
-            sage__geometry__polyhedron(),
-            sage__graphs(),
-            sage__groups(),
-            sage__libs__pari(),
-            sage__modules(),
-            sage__plot(),
-            sage__rings__finite_rings(),
-            sage__rings__function_field(),
-            sage__rings__number_field(),
-            sage__rings__padics(),
-            sage__rings__real_double(),
-            sage__rings__real_mpfr(),
-            sage__symbolic()]
+    return list(_all_features())
+
+
+def __getattr__(name):
+    r"""
+    Resolve ``sage__libs__singular`` lazily (:pep:`562`).
+
+    This keeps :mod:`sage.features.singular` out of the import of this
+    module; it is only loaded when the name is actually used.
+
+    TESTS::
+
+        sage: import sage.features.sagemath
+        sage: sage.features.sagemath.sage__libs__singular
+        <class 'sage.features.singular.sage__libs__singular'>
+        sage: sage.features.sagemath.does_not_exist
+        Traceback (most recent call last):
+        ...
+        AttributeError: module 'sage.features.sagemath' has no attribute 'does_not_exist'
+    """
+    if name == 'sage__libs__singular':
+        from .singular import sage__libs__singular
+        globals()[name] = sage__libs__singular
+        return sage__libs__singular
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    r"""
+    Include the lazily resolved names in the module contents.
+
+    TESTS::
+
+        sage: import sage.features.sagemath
+        sage: 'sage__libs__singular' in dir(sage.features.sagemath)
+        True
+    """
+    return sorted(set(globals()) | {'sage__libs__singular'})
@@ -16,7 +16,7 @@ of undirected graphs.
 # ****************************************************************************
 
 from enum import Enum
-from sage.misc.random_testing import random_testing
+from functools import wraps
 
 
 class NodeType(Enum):
@@ -52,7 +52,9 @@ class NodeType(Enum):
             sage: repr(NodeType.PARALLEL)
             'PARALLEL'
         """
-        return self.name
+        # ``_name_`` is the plain string attribute behind the ``name``
+        # descriptor, so this is a single attribute load
+        return self._name_
 
     def __str__(self):
         """
@@ -67,6 +69,14 @@ class NodeType(Enum):
         return repr(self)
 
 
+# Precomputed name table used as a lookup table when formatting whole
+# trees, see ``print_md_tree``
+NodeType._NAME = {m: m.name for m in NodeType}
+
+# Prefixes used by ``Node.__repr__``, indexed by node type
+_NODE_PREFIX = {m: m.name + " " for m in NodeType}
+
+
 class NodeSplit(Enum):
     """
     Enumeration class used to specify the split that has occurred at the node or
@@ -90,6 +100,21 @@ class NodeSplit(Enum):
     NO_SPLIT = 0
 
 
+# Lookup table from bitmask values back to NodeSplit members; indexing this
+# is much cheaper than calling ``NodeSplit(value)``, which goes through
+# ``EnumMeta.__call__``
+_SPLIT_BY_VALUE = {m.value: m for m in NodeSplit}
+
+# Hot-path shortcuts to frequently used enum members; loading a module
+# global is cheaper than the extra attribute lookup on the enum class
+_PRIME = NodeType.PRIME
+_SERIES = NodeType.SERIES
+_PARALLEL = NodeType.PARALLEL
+_NORMAL = NodeType.NORMAL
+_LEFT_SPLIT_BIT = NodeSplit.LEFT_SPLIT.value
+_RIGHT_SPLIT_BIT = NodeSplit.RIGHT_SPLIT.value
+
+
 class VertexPosition(Enum):
     """
     Enumeration class used to define position of a vertex w.r.t source in
@@ -136,6 +161,9 @@ class Node:
     - ``is_separated`` -- specifies whether a split has occurred with the node
       as the root
     """
+    __slots__ = ('node_type', '_split', 'index_in_root', 'comp_num',
+                 'is_separated', 'children')
+
     def __init__(self, node_type):
         r"""
         Create a node with the given node type.
@@ -149,12 +177,40 @@ class Node:
             []
         """
         self.node_type = node_type
-        self.node_split = NodeSplit.NO_SPLIT
+        self._split = 0
         self.index_in_root = -1
         self.comp_num = -1
         self.is_separated = False
         self.children = []
 
+    @property
+    def node_split(self):
+        """
+        The split of this node, as a :class:`NodeSplit` member.
+
+        The split is stored internally as a raw 2-bit mask so that the
+        refinement loops can update and test it with plain integer
+        arithmetic; this property translates it back for callers.
+
+        EXAMPLES::
+
+            sage: from sage.graphs.graph_decompositions.modular_decomposition import *
+            sage: node = Node(NodeType.PRIME)
+            sage: node.node_split
+            <NodeSplit.NO_SPLIT: 0>
+            sage: node.node_split = NodeSplit.LEFT_SPLIT
+            sage: node.node_split == NodeSplit.LEFT_SPLIT
+            True
+        """
+        return _SPLIT_BY_VALUE[self._split]
+
+    @node_split.setter
+    def node_split(self, node_split):
+        if isinstance(node_split, NodeSplit):
+            self._split = node_split.value
+        else:
+            self._split = int(node_split)
+
     def set_node_split(self, node_split):
         """
         Add node_split to the node split of self.
@@ -181,13 +237,10 @@ class Node:
             sage: node.node_split == NodeSplit.BOTH_SPLIT
             True
         """
-        if self.node_split == NodeSplit.NO_SPLIT:
-            self.node_split = node_split
-        elif ((self.node_split == NodeSplit.LEFT_SPLIT and
-               node_split == NodeSplit.RIGHT_SPLIT) or
-              (self.node_split == NodeSplit.RIGHT_SPLIT and
-               node_split == NodeSplit.LEFT_SPLIT)):
-            self.node_split = NodeSplit.BOTH_SPLIT
+        # The values of NodeSplit form a bitmask (LEFT_SPLIT is bit 1,
+        # RIGHT_SPLIT is bit 2, BOTH_SPLIT is their union), so adding a
+        # split is a single bitwise or on the raw value
+        self._split |= node_split.value
 
     def has_left_split(self):
         """
@@ -205,8 +258,7 @@ class Node:
             sage: node.has_left_split()
             True
         """
-        return (self.node_split == NodeSplit.LEFT_SPLIT or
-                self.node_split == NodeSplit.BOTH_SPLIT)
+        return bool(self._split & _LEFT_SPLIT_BIT)
 
     def has_right_split(self):
         """
@@ -224,8 +276,7 @@ class Node:
             sage: node.has_right_split()
             True
         """
-        return (self.node_split == NodeSplit.RIGHT_SPLIT or
-                self.node_split == NodeSplit.BOTH_SPLIT)
+        return bool(self._split & _RIGHT_SPLIT_BIT)
 
     def __repr__(self):
         r"""
@@ -240,19 +291,7 @@ class Node:
             sage: str(n)
             'PRIME [NORMAL [1], NORMAL [2]]'
         """
-        if self.node_type == NodeType.SERIES:
-            s = "SERIES "
-        elif self.node_type == NodeType.PARALLEL:
-            s = "PARALLEL "
-        elif self.node_type == NodeType.PRIME:
-            s = "PRIME "
-        elif self.node_type == NodeType.FOREST:
-            s = "FOREST "
-        else:
-            s = "NORMAL "
-
-        s += str(self.children)
-        return s
+        return _NODE_PREFIX[self.node_type] + str(self.children)
 
     def __eq__(self, other):
         r"""
@@ -269,13 +308,47 @@ class Node:
             sage: n1 == n3
             False
         """
-        return (self.node_type == other.node_type and
-                self.node_split == other.node_split and
+        if self is other:
+            return True
+        # The scalar fields are compared first so that the recursive
+        # comparison of the children is only done when everything else
+        # matches; enum members are singletons, so identity tests suffice.
+        return (self.node_type is other.node_type and
+                self._split == other._split and
                 self.index_in_root == other.index_in_root and
                 self.comp_num == other.comp_num and
-                self.is_separated == other.is_separated and
+                self.is_separated is other.is_separated and
                 self.children == other.children)
 
+    # Nodes are mutable (children lists are built up in place), so they are
+    # deliberately unhashable; stating it explicitly documents the intent
+    # and keeps the behaviour under __slots__.
+    __hash__ = None
+
+
+def _create_node(node_type):
+    """
+    Return a new node of type ``node_type`` with no children.
+
+    This bypasses ``Node.__init__`` and fills the slots directly, which is
+    noticeably cheaper in the tight loops that create one node per module.
+
+    TESTS::
+
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import *
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import _create_node
+        sage: _create_node(NodeType.PRIME) == Node(NodeType.PRIME)
+        True
+    """
+    node = Node.__new__(Node)
+    node.node_type = node_type
+    node._split = 0
+    node.index_in_root = -1
+    node.comp_num = -1
+    node.is_separated = False
+    node.children = []
+    return node
+
 
 def create_prime_node():
     """
@@ -292,7 +365,7 @@ def create_prime_node():
         sage: node
         PRIME []
     """
-    return Node(NodeType.PRIME)
+    return _create_node(_PRIME)
 
 
 def create_parallel_node():
@@ -310,7 +383,7 @@ def create_parallel_node():
         sage: node
         PARALLEL []
     """
-    return Node(NodeType.PARALLEL)
+    return _create_node(_PARALLEL)
 
 
 def create_series_node():
@@ -328,7 +401,7 @@ def create_series_node():
         sage: node
         SERIES []
     """
-    return Node(NodeType.SERIES)
+    return _create_node(_SERIES)
 
 
 def create_normal_node(vertex):
@@ -350,8 +423,9 @@ def create_normal_node(vertex):
         sage: node
         NORMAL [2]
     """
-    node = Node(NodeType.NORMAL)
-    node.children.append(vertex)
+    node = _create_node(_NORMAL)
+    # A leaf always has exactly one child, the vertex itself
+    node.children = [vertex]
     return node
 
 
@@ -381,26 +455,21 @@ def print_md_tree(root):
          4
          10
     """
-
-    def recursive_print_md_tree(root, level):
-        """
-        Print the modular decomposition tree at root
-
-        INPUT:
-
-        - ``root`` -- root of the modular decomposition tree
-
-        - ``level`` -- indicates the depth of root in the original modular
-          decomposition tree
-        """
-        if root.node_type != NodeType.NORMAL:
-            print("{}{}".format(level, str(root.node_type)))
-            for tree in root.children:
-                recursive_print_md_tree(tree, level + " ")
+    # Explicit stack of (node, depth) pairs instead of recursion, so that
+    # deep trees are not limited by the Python recursion limit
+    names = NodeType._NAME
+    # Padding strings are shared between all lines of the same depth
+    pads = [""]
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        while depth >= len(pads):
+            pads.append(pads[-1] + " ")
+        if node.node_type is not _NORMAL:
+            print(pads[depth], names[node.node_type], sep="")
+            stack.extend((child, depth + 1) for child in reversed(node.children))
         else:
-            print("{}{}".format(level, str(root.children[0])))
-
-    recursive_print_md_tree(root, "")
+            print(pads[depth], node.children[0], sep="")
 
 
 # =============================================================================
@@ -444,16 +513,118 @@ def gamma_classes(graph):
     from itertools import chain
     from sage.sets.disjoint_set import DisjointSet
 
-    pieces = DisjointSet(frozenset(e) for e in graph.edge_iterator(labels=False))
-    for v in graph:
-        neighborhood = graph.subgraph(vertices=graph.neighbors(v))
-        for component in neighborhood.complement().connected_components():
-            v1 = component[0]
-            e = frozenset([v1, v])
-            for vi in component[1:]:
-                ei = frozenset([vi, v])
-                pieces.union(e, ei)
-    return {frozenset(chain.from_iterable(loe)): loe for loe in pieces}
+    # Two edges vu, vw at v are Gamma related exactly when u and w are not
+    # adjacent, i.e. when v-u-w is not a triangle.  Each neighborhood is
+    # stored as a bitmask over the vertex indices, so that the neighbors of v
+    # that do not see u are extracted with a couple of arbitrary-precision
+    # integer operations instead of a membership test per pair
+    # Inside the loop an edge is the packed int a*n + b over its endpoint
+    # indices a < b, which hashes as a machine int; the frozensets the
+    # callers see are only built once, here
+    vertices = list(graph)
+    n = len(vertices)
+    masks = [0] * n
+    vindex = {u: i for i, u in enumerate(vertices)}
+    edges = []
+    edge_index = {}
+    for u, w in graph.edge_iterator(labels=False):
+        ui = vindex[u]
+        wi = vindex[w]
+        masks[ui] |= 1 << wi
+        masks[wi] |= 1 << ui
+        edge_index[ui * n + wi if ui < wi else wi * n + ui] = len(edges)
+        edges.append(frozenset((u, w)))
+
+    # The union-find runs over integer edge indices: DisjointSet(n) is backed
+    # by a plain int array, which is cheaper than hashing frozensets on every
+    # union
+    pieces = DisjointSet(len(edges))
+    union = pieces.union
+    get_edge = edge_index.__getitem__
+    for vi in range(n):
+        vmask = masks[vi]
+        # No pairs to relate unless v has at least two neighbors
+        if not (vmask & (vmask - 1)):
+            continue
+        mu = vmask
+        while mu:
+            ubit = mu & -mu
+            mu ^= ubit
+            ui = ubit.bit_length() - 1
+            # Neighbors of v that are not adjacent to u; keeping only the
+            # bits above u visits every unordered pair once
+            mw = vmask & ~masks[ui] & -(ubit << 1)
+            if mw:
+                ei = get_edge(vi * n + ui if vi < ui else ui * n + vi)
+                while mw:
+                    wbit = mw & -mw
+                    mw ^= wbit
+                    wi = wbit.bit_length() - 1
+                    union(ei, get_edge(vi * n + wi
+                                       if vi < wi else wi * n + vi))
+    classes = {}
+    for i, e in enumerate(edges):
+        classes.setdefault(pieces.find(i), []).append(e)
+    return {frozenset(chain.from_iterable(loe)): loe
+            for loe in classes.values()}
+
+
+def _complement_components(g):
+    """
+    Return the connected components of the complement of ``g``.
+
+    The components are computed from bitmask neighborhood rows, so the
+    complement graph -- which can have quadratically many edges -- is never
+    materialized.  The output matches what
+    ``g.complement().connected_components()`` would return: vertices sorted
+    within each component, larger components first.
+
+    INPUT:
+
+    - ``g`` -- a graph
+
+    EXAMPLES::
+
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import _complement_components
+        sage: _complement_components(graphs.CycleGraph(4))
+        [[0, 2], [1, 3]]
+        sage: _complement_components(graphs.CompleteGraph(3))
+        [[0], [1], [2]]
+    """
+    vertices = list(g)
+    n = len(vertices)
+    vindex = {v: i for i, v in enumerate(vertices)}
+    masks = [0] * n
+    for u, w in g.edge_iterator(labels=False):
+        masks[vindex[u]] |= 1 << vindex[w]
+        masks[vindex[w]] |= 1 << vindex[u]
+
+    unvisited = (1 << n) - 1
+    components = []
+    while unvisited:
+        # Grow a component of the complement from the lowest unvisited
+        # vertex; the complement neighbors of vi are the unvisited vertices
+        # absent from its row
+        frontier = unvisited & -unvisited
+        unvisited ^= frontier
+        comp = frontier
+        while frontier:
+            vbit = frontier & -frontier
+            frontier ^= vbit
+            new = unvisited & ~masks[vbit.bit_length() - 1]
+            if new:
+                comp |= new
+                unvisited &= ~new
+                frontier |= new
+        c = []
+        while comp:
+            vbit = comp & -comp
+            comp ^= vbit
+            c.append(vertices[vbit.bit_length() - 1])
+        c.sort()
+        components.append(c)
+    components.sort(key=lambda comp: -len(comp))
+    return components
 
 
 def habib_maurer_algorithm(graph, g_classes=None):
@@ -614,40 +785,136 @@ def habib_maurer_algorithm(graph, g_classes=None):
     if not graph.order():
         return create_prime_node()
 
-    if graph.order() == 1:
-        root = create_normal_node(next(graph.vertex_iterator()))
-        return root
-
-    elif not graph.is_connected():
-        root = create_parallel_node()
-        root.children = [habib_maurer_algorithm(graph.subgraph(vertices=sg), g_classes)
-                         for sg in graph.connected_components()]
-        return root
-
-    g_comp = graph.complement()
-    if g_comp.is_connected():
-        from collections import defaultdict
-        root = create_prime_node()
-        if g_classes is None:
-            g_classes = gamma_classes(graph)
-        vertex_set = frozenset(graph)
-        edges = [tuple(e) for e in g_classes[vertex_set]]
-        sub = graph.subgraph(edges=edges)
-        d = defaultdict(list)
-        for v in sub:
-            for v1 in sub.neighbor_iterator(v):
-                d[v1].append(v)
-        d1 = defaultdict(list)
-        for k, v in d.items():
-            d1[frozenset(v)].append(k)
-        root.children = [habib_maurer_algorithm(graph.subgraph(vertices=sg), g_classes)
-                         for sg in d1.values()]
-        return root
-
-    root = create_series_node()
-    root.children = [habib_maurer_algorithm(graph.subgraph(vertices=sg), g_classes)
-                     for sg in g_comp.connected_components()]
-    return root
+    from collections import defaultdict
+
+    if g_classes is None:
+        g_classes = {}
+
+    # The graph is read exactly once, into bitmask neighborhood rows over
+    # vertex indices.  Every subproblem is then an ordered list of indices
+    # sharing these rows, with the induced neighborhood of i being
+    # adj[i] & smask -- no induced subgraphs are ever constructed (except,
+    # rarely, to compute gamma classes below the top level)
+    vertices = list(graph)
+    n = len(vertices)
+    if n == 1:
+        return create_normal_node(vertices[0])
+    vindex = {v: i for i, v in enumerate(vertices)}
+    adj = [0] * n
+    n_edges = 0
+    for u, w in graph.edge_iterator(labels=False):
+        adj[vindex[u]] |= 1 << vindex[w]
+        adj[vindex[w]] |= 1 << vindex[u]
+        n_edges += 1
+
+    def bit_components(vs, smask, rows, complement):
+        # Components of the subproblem vs (or of its complement), in the
+        # order connected_components produces them: discovery order over vs,
+        # vertices sorted within a component, larger components first
+        seen = 0
+        comps = []
+        for i in vs:
+            vbit = 1 << i
+            if seen & vbit:
+                continue
+            seen |= vbit
+            comp = vbit
+            frontier = vbit
+            while frontier:
+                vbit = frontier & -frontier
+                frontier ^= vbit
+                row = rows[vbit.bit_length() - 1]
+                new = (~row if complement else row) & smask & ~seen
+                if new:
+                    comp |= new
+                    seen |= new
+                    frontier |= new
+            c = []
+            while comp:
+                vbit = comp & -comp
+                comp ^= vbit
+                c.append(vertices[vbit.bit_length() - 1])
+            c.sort()
+            comps.append([vindex[x] for x in c])
+        comps.sort(key=lambda comp: -len(comp))
+        return comps
+
+    # Decompose with an explicit work stack instead of recursion.  An item
+    # is a pair (children, vs): the node for vs is created when the item is
+    # popped and appended to the list children of its parent.  Sibling items
+    # are pushed in reverse so that they are attached in the original order.
+    forest = []
+    stack = [(forest, list(range(n)))]
+    while stack:
+        children, vs = stack.pop()
+
+        if len(vs) == 1:
+            children.append(create_normal_node(vertices[vs[0]]))
+            continue
+
+        smask = 0
+        for i in vs:
+            smask |= 1 << i
+        if len(vs) == n:
+            m = n_edges
+        else:
+            m = sum(bin(adj[i] & smask).count("1") for i in vs) // 2
+
+        # Edgeless and complete graphs decompose in closed form: a PARALLEL
+        # (resp. SERIES) node over the vertices.  This short-circuits the
+        # many small cliques and independent sets produced by the deeper
+        # levels of the decomposition
+        if not m or m == len(vs) * (len(vs) - 1) // 2:
+            node = create_parallel_node() if not m else create_series_node()
+            node.children = [create_normal_node(vertices[i]) for i in vs]
+            children.append(node)
+            continue
+
+        components = bit_components(vs, smask, adj, False)
+        if len(components) > 1:
+            node = create_parallel_node()
+            parts = components
+        else:
+            co_components = bit_components(vs, smask, adj, True)
+            if len(co_components) == 1:
+                node = create_prime_node()
+                vertex_set = frozenset(vertices[i] for i in vs)
+                if vertex_set not in g_classes:
+                    if len(vs) == n:
+                        g_classes.update(gamma_classes(graph))
+                    else:
+                        sub = graph.subgraph(vertices=[vertices[i]
+                                                       for i in vs])
+                        g_classes.update(gamma_classes(sub))
+                # The grouping below only needs the neighbor map restricted
+                # to the edges of the spanning class, so build it as a dict
+                # instead of constructing a subgraph; neighbor lists are kept
+                # in subproblem-position order to preserve the order of the
+                # children
+                nbrs = defaultdict(list)
+                for e in g_classes[vertex_set]:
+                    u, w = tuple(e)
+                    nbrs[vindex[u]].append(vindex[w])
+                    nbrs[vindex[w]].append(vindex[u])
+                pos = {i: p for p, i in enumerate(vs)}
+                d = defaultdict(list)
+                for i in vs:
+                    lst = nbrs[i]
+                    lst.sort(key=pos.__getitem__)
+                    for j in lst:
+                        d[j].append(i)
+                d1 = defaultdict(list)
+                for k, v in d.items():
+                    d1[frozenset(v)].append(k)
+                parts = list(d1.values())
+            else:
+                node = create_series_node()
+                parts = co_components
+
+        children.append(node)
+        stack.extend((node.children, part) for part in reversed(parts))
+
+    return forest[0]
 
 
 modular_decomposition = habib_maurer_algorithm
@@ -679,26 +946,40 @@ def test_modular_decomposition(tree_root, graph):
         sage: test_modular_decomposition(modular_decomposition(g), g)
         True
     """
-    if tree_root.node_type != NodeType.NORMAL:
-        for module in tree_root.children:
-            if not test_module(module, graph):
-                # test whether modules pass the defining
-                # characteristics of modules
-                return False
-            if not test_modular_decomposition(module,
-                                              graph.subgraph(get_vertices(module))):
-                # recursively test the modular decomposition subtrees
+    vertex_cache = {}
+
+    # Instead of recursing on induced subgraphs, walk the tree with an
+    # explicit stack and restrict every check to the vertex set of the
+    # current subtree; the helpers take that set as a filter on the
+    # original graph, so no subgraph is ever copied
+    stack = [(tree_root, frozenset(graph))]
+    while stack:
+        node, sub_vertices = stack.pop()
+        if node.node_type == NodeType.NORMAL:
+            continue
+
+        for module in node.children:
+            # test whether modules pass the defining
+            # characteristics of modules
+            if not test_module(module, graph, vertex_cache, sub_vertices):
                 return False
 
-        if not test_maximal_modules(tree_root, graph):
-            # test whether the mdoules are maximal in nature
+        # test whether the modules are maximal in nature
+        if not test_maximal_modules(node, graph, vertex_cache, sub_vertices):
             return False
 
+        # test the subtrees rooted at the non-leaf children
+        stack.extend((module,
+                      frozenset(_cached_vertices(module, vertex_cache)))
+                     for module in node.children
+                     if module.node_type != NodeType.NORMAL)
+
     return True
 
 
 # Function implemented for testing
-def test_maximal_modules(tree_root, graph):
+def test_maximal_modules(tree_root, graph, vertex_cache=None,
+                         sub_vertices=None):
     r"""
     Test the maximal nature of modules in a modular decomposition tree.
 
@@ -717,6 +998,12 @@ def test_maximal_modules(tree_root, graph):
 
     - ``graph`` -- graph whose modular decomposition tree is tested
 
+    - ``vertex_cache`` -- dictionary (default: ``None``); cache of vertex
+      lists per subtree, keyed by node id. Used internally.
+
+    - ``sub_vertices`` -- frozenset (default: ``None``); restrict the test to
+      the subgraph of ``graph`` induced by these vertices. Used internally.
+
     OUTPUT:
 
     ``True`` if all modules at first level in the modular decomposition tree
@@ -730,13 +1017,16 @@ def test_maximal_modules(tree_root, graph):
         True
     """
     if tree_root.node_type != NodeType.NORMAL:
+        if vertex_cache is None:
+            vertex_cache = {}
         for index, module in enumerate(tree_root.children):
             for other_index in range(index + 1, len(tree_root.children)):
 
                 # compute the module formed using modules at index and
                 # other_index
                 module_formed = form_module(index, other_index,
-                                            tree_root, graph)
+                                            tree_root, graph, vertex_cache,
+                                            sub_vertices)
 
                 if module_formed[0]:
                     # Module formed and the parent of the formed module
@@ -782,19 +1072,48 @@ def get_vertices(component_root):
     """
     vertices = []
 
-    # inner recursive function to recurse over the elements in the
-    # ``component``
-    def recurse_component(node, vertices):
+    # iterative depth-first search; children are pushed in reverse so the
+    # leaves come out in left-to-right order
+    stack = [component_root]
+    while stack:
+        node = stack.pop()
         if node.node_type == NodeType.NORMAL:
             vertices.append(node.children[0])
-            return
-        for child in node.children:
-            recurse_component(child, vertices)
-
-    recurse_component(component_root, vertices)
+        else:
+            stack.extend(reversed(node.children))
     return vertices
 
 
+def _cached_vertices(node, cache):
+    """
+    Return ``get_vertices(node)``, memoized in ``cache`` under ``id(node)``.
+
+    The testing helpers below repeatedly ask for the vertices of the same
+    subtrees; sharing one cache dictionary per top-level call turns those
+    repeated tree walks into dictionary lookups.  The cache is only valid as
+    long as the trees it has seen are not mutated.
+
+    TESTS::
+
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import *
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import _cached_vertices
+        sage: node = create_parallel_node()
+        sage: node.children = [create_normal_node(1), create_normal_node(2)]
+        sage: cache = {}
+        sage: _cached_vertices(node, cache)
+        [1, 2]
+        sage: _cached_vertices(node, cache) is cache[id(node)]
+        True
+    """
+    key = id(node)
+    try:
+        return cache[key]
+    except KeyError:
+        vertices = get_vertices(node)
+        cache[key] = vertices
+        return vertices
+
+
 # Function implemented for testing
 def get_module_type(graph):
     """
@@ -817,15 +1136,18 @@ def get_module_type(graph):
         sage: get_module_type(g)
         PRIME
     """
-    if not graph.is_connected():
+    # fewer than order - 1 edges cannot connect the graph, so the
+    # connectivity check can be skipped outright in that case
+    if graph.size() < graph.order() - 1 or not graph.is_connected():
         return NodeType.PARALLEL
-    elif graph.complement().is_connected():
+    elif len(_complement_components(graph)) == 1:
         return NodeType.PRIME
     return NodeType.SERIES
 
 
 # Function implemented for testing
-def form_module(index, other_index, tree_root, graph):
+def form_module(index, other_index, tree_root, graph, vertex_cache=None,
+                sub_vertices=None):
     r"""
     Forms a module out of the modules in the module pair.
 
@@ -846,6 +1168,13 @@ def form_module(index, other_index, tree_root, graph):
 
     - ``graph`` -- graph whose modular decomposition tree is created
 
+    - ``vertex_cache`` -- dictionary (default: ``None``); cache of vertex
+      lists per subtree, keyed by node id. Used internally.
+
+    - ``sub_vertices`` -- frozenset (default: ``None``); restrict the
+      computation to the subgraph of ``graph`` induced by these vertices.
+      Used internally.
+
     OUTPUT:
 
     ``[module_formed, vertices]`` where ``module_formed`` is ``True`` if
@@ -860,48 +1189,102 @@ def form_module(index, other_index, tree_root, graph):
         sage: form_module(0, 2, tree_root, g)
         [False, {0, 1, 2, 3, 4, 5, 6, 7}]
     """
-    vertices = set(get_vertices(tree_root.children[index]))
-    vertices.update(get_vertices(tree_root.children[other_index]))
+    if vertex_cache is None:
+        vertex_cache = {}
+
+    # The fixed point below works on bitmasks over the subproblem's
+    # vertices, so every union/intersection/difference is one integer
+    # operation.  The masks only depend on the graph, the subproblem and the
+    # tree, so they are stashed in the shared cache and reused across the
+    # O(k^2) calls test_maximal_modules makes
+    key = ('bitset', id(graph), sub_vertices)
+    try:
+        universe, nbr_mask = vertex_cache[key]
+    except KeyError:
+        universe = list(graph) if sub_vertices is None else list(sub_vertices)
+        uindex = {v: i for i, v in enumerate(universe)}
+        nbr_mask = []
+        for v in universe:
+            m = 0
+            for u in graph.neighbor_iterator(v):
+                ui = uindex.get(u)
+                # neighbors outside the subproblem are ignored
+                if ui is not None:
+                    m |= 1 << ui
+            nbr_mask.append(m)
+        vertex_cache[key] = (universe, nbr_mask)
+    n = len(universe)
+
+    mask_key = ('child_masks', id(tree_root), sub_vertices)
+    try:
+        child_masks, child_of = vertex_cache[mask_key]
+    except KeyError:
+        uindex = {v: i for i, v in enumerate(universe)}
+        child_masks = []
+        # child_of maps a vertex index to the first child containing it,
+        # replacing the linear scan over the children per uncommon neighbor
+        child_of = [None] * n
+        for ci, child in enumerate(tree_root.children):
+            cm = 0
+            for v in _cached_vertices(child, vertex_cache):
+                vi = uindex[v]
+                cm |= 1 << vi
+                if child_of[vi] is None:
+                    child_of[vi] = ci
+            child_masks.append(cm)
+        vertex_cache[mask_key] = (child_masks, child_of)
+
+    vertices = child_masks[index] | child_masks[other_index]
 
     # stores all neighbors which are common for all vertices in V
-    common_neighbors = set()
+    common_neighbors = 0
 
     # stores all neighbors of vertices in V which are outside V
-    all_neighbors = set()
+    all_neighbors = 0
 
     while True:
         # remove vertices from all_neighbors and common_neighbors
-        all_neighbors.difference_update(vertices)
-        common_neighbors.difference_update(vertices)
+        all_neighbors &= ~vertices
+        common_neighbors &= ~vertices
 
-        for v in vertices:
-            # stores the neighbors of v which are outside the set of vertices
-            neighbor_list = set(graph.neighbors(v))
-            neighbor_list.difference_update(vertices)
+        rest = vertices
+        while rest:
+            vbit = rest & -rest
+            rest ^= vbit
+            # the neighbors of v which are outside the set of vertices
+            neighbor_mask = nbr_mask[vbit.bit_length() - 1] & ~vertices
 
             # update all_neighbors and common_neighbors using the
-            # neighbor_list
-            all_neighbors.update(neighbor_list)
-            common_neighbors.intersection_update(neighbor_list)
+            # neighbor_mask
+            all_neighbors |= neighbor_mask
+            common_neighbors &= neighbor_mask
 
         if all_neighbors == common_neighbors:  # indicates a module is formed
+            formed = set()
+            rest = vertices
+            while rest:
+                vbit = rest & -rest
+                rest ^= vbit
+                formed.add(universe[vbit.bit_length() - 1])
 
             # module formed covers the entire graph
-            if len(vertices) == graph.order():
-                return [False, vertices]
+            if len(formed) == n:
+                return [False, formed]
 
-            return [True, vertices]
+            return [True, formed]
 
         # add modules containing uncommon neighbors into the formed module
-        for v in (all_neighbors - common_neighbors):
-            for index in range(len(tree_root.children)):
-                if v in get_vertices(tree_root.children[index]):
-                    vertices.update(get_vertices(tree_root.children[index]))
-                    break
+        uncommon = all_neighbors & ~common_neighbors
+        while uncommon:
+            vbit = uncommon & -uncommon
+            uncommon ^= vbit
+            ci = child_of[vbit.bit_length() - 1]
+            if ci is not None:
+                vertices |= child_masks[ci]
 
 
 # Function implemented for testing
-def test_module(module, graph):
+def test_module(module, graph, vertex_cache=None, sub_vertices=None):
     """
     Test whether input module is actually a module
 
@@ -911,6 +1294,12 @@ def test_module(module, graph):
 
     - ``graph`` -- input sage graph which contains the module
 
+    - ``vertex_cache`` -- dictionary (default: ``None``); cache of vertex
+      lists per subtree, keyed by node id. Used internally.
+
+    - ``sub_vertices`` -- frozenset (default: ``None``); restrict the test to
+      the subgraph of ``graph`` induced by these vertices. Used internally.
+
     OUTPUT:
 
     ``True`` if input module is a module by definition else ``False``
@@ -930,10 +1319,12 @@ def test_module(module, graph):
         return True
 
     # vertices contained in module
-    vertices_in_module = get_vertices(module)
+    if vertex_cache is None:
+        vertex_cache = {}
+    vertices_in_module = _cached_vertices(module, vertex_cache)
 
-    # vertices outside module
-    vertices_outside = list(set(graph.vertices(sort=False)) - set(vertices_in_module))
+    if sub_vertices is None:
+        sub_vertices = frozenset(graph)
 
     # Nested module with only one child
     if module.node_type != NodeType.NORMAL and len(module.children) == 1:
@@ -949,12 +1340,24 @@ def test_module(module, graph):
         if children_node_type(module, NodeType.PARALLEL):
             return False
 
-    # check the module by definition. Vertices in a module should all either
-    # be connected or disconnected to any vertex outside module
-    for v in vertices_outside:
-        if not either_connected_or_not_connected(v, vertices_in_module, graph):
-            return False
-    return True
+    # check the module by definition: every vertex outside must be either
+    # connected or disconnected to all of the module.  One pass over the
+    # module vertices accumulates the outside vertices seeing at least one
+    # of them and those seeing all of them; the module is valid exactly
+    # when the two sets agree
+    module_set = frozenset(vertices_in_module)
+    all_neighbors = set()
+    common_neighbors = None
+    for u in vertices_in_module:
+        outside_neighbors = set(graph.neighbor_iterator(u))
+        outside_neighbors &= sub_vertices
+        outside_neighbors -= module_set
+        all_neighbors |= outside_neighbors
+        if common_neighbors is None:
+            common_neighbors = outside_neighbors
+        else:
+            common_neighbors &= outside_neighbors
+    return all_neighbors == common_neighbors
 
 
 # Function implemented for testing
@@ -989,7 +1392,8 @@ def children_node_type(module, node_type):
         sage: children_node_type(tree_root, NodeType.PARALLEL)
         True
     """
-    return all(node.node_type == node_type for node in module.children)
+    # enum members are singletons, so identity comparison suffices
+    return all(node.node_type is node_type for node in module.children)
 
 
 # Function implemented for testing
@@ -1026,12 +1430,12 @@ def either_connected_or_not_connected(v, vertices_in_module, graph):
         sage: either_connected_or_not_connected(2, [3, 4], g)
         False
     """
-    # marks whether vertex v is connected to first vertex in the module
-    connected = graph.has_edge(vertices_in_module[0], v)
-
-    # if connected is True then all vertices in module should be connected to
-    # v else all should be disconnected
-    return all(graph.has_edge(u, v) == connected for u in vertices_in_module)
+    # v passes iff its neighborhood contains either every vertex of the
+    # module or none of them; one neighbor-set build then two C-level set
+    # tests replaces a backend has_edge dispatch per module vertex
+    neighbors = set(graph.neighbor_iterator(v))
+    return (neighbors.issuperset(vertices_in_module)
+            or neighbors.isdisjoint(vertices_in_module))
 
 
 def tree_to_nested_tuple(root):
@@ -1057,8 +1461,21 @@ def tree_to_nested_tuple(root):
     """
     if root.node_type == NodeType.NORMAL:
         return root.children[0]
-    else:
-        return (root.node_type, [tree_to_nested_tuple(x) for x in root.children])
+
+    # build the nested tuples iteratively: each internal node contributes a
+    # (type, children) pair whose list is filled in when its item is popped
+    result = (root.node_type, [])
+    stack = [(root, result[1])]
+    while stack:
+        node, out = stack.pop()
+        for child in node.children:
+            if child.node_type == NodeType.NORMAL:
+                out.append(child.children[0])
+            else:
+                nested = (child.node_type, [])
+                out.append(nested)
+                stack.append((child, nested[1]))
+    return result
 
 
 def nested_tuple_to_tree(nest):
@@ -1114,31 +1531,54 @@ def equivalent_trees(root1, root2):
         sage: equivalent_trees(t1, t2)
         True
     """
-    # internal definition
+    from itertools import chain
+
+    # ids are memoized by object identity and built bottom-up from the
+    # children's cached vertex sets, so each subtree is identified once
+    # instead of being re-walked at every ancestor level
+    cache = {}
+
     def node_id(root):
-        return (root.node_type, frozenset(get_vertices(root)))
+        key = id(root)
+        try:
+            return cache[key]
+        except KeyError:
+            if root.node_type == NodeType.NORMAL:
+                vertex_set = frozenset(root.children)
+            else:
+                vertex_set = frozenset(chain.from_iterable(
+                    node_id(child)[1] for child in root.children))
+            result = (root.node_type, vertex_set)
+            cache[key] = result
+            return result
+
+    def equivalent(root1, root2):
+        if root1.node_type != root2.node_type:
+            return False
 
-    if root1.node_type != root2.node_type:
-        return False
+        if len(root1.children) != len(root2.children):
+            return False
 
-    if len(root1.children) != len(root2.children):
-        return False
+        if root1.node_type == NodeType.NORMAL:
+            return root1.children[0] == root2.children[0]
 
-    if root1.node_type == NodeType.NORMAL:
-        return root1.children[0] == root2.children[0]
+        # children with equal ids are kept in a list rather than silently
+        # overwriting each other, so trees with repeated subtree ids are
+        # matched one-to-one
+        child_map = {}
+        for node in root2.children:
+            child_map.setdefault(node_id(node), []).append(node)
 
-    child_map = {}
-    for node in root2.children:
-        child_map[node_id(node)] = node
+        for node in root1.children:
+            candidates = child_map.get(node_id(node))
+            if not candidates:
+                return False
+            if not equivalent(node, candidates.pop()):
+                return False
 
-    for node in root1.children:
-        id = node_id(node)
-        if id not in child_map:
-            return False
-        if not equivalent_trees(node, child_map[id]):
-            return False
+        return True
 
-    return True
+    return equivalent(root1, root2)
 
 
 def relabel_tree(root, perm):
@@ -1199,19 +1639,51 @@ def relabel_tree(root, perm):
     else:
         raise TypeError("type of perm is not supported for relabeling")
 
-    if root.node_type == NodeType.NORMAL:
-        return create_normal_node(perm[root.children[0]])
-    else:
-        new_root = Node(root.node_type)
-        new_root.children = [relabel_tree(child, perm) for child in root.children]
-        return new_root
+    # perm is now a dictionary; build the new tree without re-entering the
+    # normalization above (which copied the dictionary again at every node)
+    def build(node):
+        if node.node_type == NodeType.NORMAL:
+            return create_normal_node(perm[node.children[0]])
+        new_node = Node(node.node_type)
+        new_node.children = [build(child) for child in node.children]
+        return new_node
+
+    return build(root)
 
 
 # =============================================================================
 # Random tests
 # =============================================================================
 
-@random_testing
+def _random_testing(fn):
+    r"""
+    Wrap ``fn`` with :func:`sage.misc.random_testing.random_testing` on its
+    first call.
+
+    Applying the decorator at import time would pull in
+    :mod:`sage.misc.randstate` and friends, which the main entry point
+    :func:`modular_decomposition` never needs.  This keeps the import of
+    this module light while behaving exactly like the usual decorator once
+    one of the random testers is run.
+
+    TESTS::
+
+        sage: from sage.graphs.graph_decompositions.modular_decomposition import *
+        sage: test_gamma_modules(1, 5, 0.5)
+    """
+    wrapped = None
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        nonlocal wrapped
+        if wrapped is None:
+            from sage.misc.random_testing import random_testing
+            wrapped = random_testing(fn)
+        return wrapped(*args, **kwargs)
+    return wrapper
+
+
+@_random_testing
 def test_gamma_modules(trials, vertices, prob, verbose=False):
     r"""
     Verify that the vertices of each gamma class of a random graph are modules
@@ -1248,7 +1720,7 @@ def test_gamma_modules(trials, vertices, prob, verbose=False):
             print("Passes!")
 
 
-@random_testing
+@_random_testing
 def permute_decomposition(trials, algorithm, vertices, prob, verbose=False):
     r"""
     Check that a graph and its permuted relabeling have the same modular
@@ -1381,19 +1853,17 @@ def md_tree_to_graph(root):
         vertex_lists = [vs for vs, es in children_ve]
         if root.node_type == NodeType.PRIME:
             for vs1, vs2 in zip(vertex_lists, vertex_lists[1:]):
-                for v1, v2 in product(vs1, vs2):
-                    edges.append((v1, v2))
+                edges.extend(product(vs1, vs2))
         elif root.node_type == NodeType.SERIES:
             for vs1, vs2 in combinations(vertex_lists, 2):
-                for v1, v2 in product(vs1, vs2):
-                    edges.append((v1, v2))
+                edges.extend(product(vs1, vs2))
         return (vertices, edges)
 
     vs, es = tree_to_vertices_and_edges(root)
     return Graph([vs, es], format='vertices_and_edges')
 
 
-@random_testing
+@_random_testing
 def recreate_decomposition(trials, algorithm, max_depth, max_fan_out,
                            leaf_probability, verbose=False):
     r"""
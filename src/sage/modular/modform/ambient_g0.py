@@ -96,12 +96,16 @@ class ModularFormsAmbient_g0_Q(ambient.ModularFormsAmbient):
         """
         return eisenstein_submodule.EisensteinSubmodule_g0_Q(self)
 
+    @cached_method
     def _compute_atkin_lehner_matrix(self, d):
         r"""
         Compute the matrix of the Atkin-Lehner operator W_d acting on self,
         where d is a divisor of the level.  This is only implemented in the
         (trivial) level 1 case.
 
+        The result only depends on ``d``, so it is cached; repeated calls
+        reuse the identity matrix instead of allocating a fresh one.
+
         EXAMPLES::
 
             sage: ModularForms(1, 30).atkin_lehner_operator()
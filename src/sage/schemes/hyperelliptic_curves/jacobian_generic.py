@@ -126,6 +126,21 @@ class HyperellipticJacobian_generic(Jacobian_generic):
         sage: J1 == J2
         False
     """
+    @lazy_attribute
+    def _dimension(self):
+        """
+        The dimension of this Jacobian, i.e. the genus of its curve.
+
+        The genus does not change, so it is computed only once.
+
+        EXAMPLES::
+
+            sage: k.<a> = GF(9); R.<x> = k[]
+            sage: HyperellipticCurve(x^6 + x - 1, x+a).jacobian()._dimension
+            2
+        """
+        return Integer(self.curve().genus())
+
     def dimension(self):
         """
         Return the dimension of this Jacobian.
@@ -144,11 +159,49 @@ class HyperellipticJacobian_generic(Jacobian_generic):
             sage: type(g)
             <... 'sage.rings.integer.Integer'>
         """
-        return Integer(self.curve().genus())
+        return self._dimension
+
+    @lazy_attribute
+    def _base_point_homset(self):
+        """
+        The set of points of this Jacobian over its base ring.
+
+        Every call to :meth:`point` needs this homset, so it is computed
+        once and stored.
+
+        EXAMPLES::
+
+            sage: FF = FiniteField(2003)
+            sage: R.<x> = PolynomialRing(FF)
+            sage: f = x**5 + 1184*x**3 + 1846*x**2 + 956*x + 560
+            sage: J = HyperellipticCurve(f).jacobian()
+            sage: J._base_point_homset is J(FF)
+            True
+        """
+        return self(self.base_ring())
 
     def point(self, mumford, check=True):
+        """
+        Return a point of this Jacobian.
+
+        INPUT:
+
+        - ``mumford`` -- data determining a Mumford divisor, e.g. a list
+          of two polynomials
+
+        - ``check`` -- boolean (default: ``True``)
+
+        EXAMPLES::
+
+            sage: FF = FiniteField(2003)
+            sage: R.<x> = PolynomialRing(FF)
+            sage: f = x**5 + 1184*x**3 + 1846*x**2 + 956*x + 560
+            sage: J = HyperellipticCurve(f).jacobian()
+            sage: J.point([x**2 + 376*x + 245, 1015*x + 1368])
+            (x^2 + 376*x + 245, y + 988*x + 635)
+        """
         try:
-            return self(self.base_ring())(mumford)
+            return self._base_point_homset(mumford)
         except AttributeError:
             raise ValueError("Arguments must determine a valid Mumford divisor.")
 
@@ -56,7 +56,8 @@ EXAMPLES::
 # policies, either expressed or implied, of the FreeBSD Project.
 #*****************************************************************************/
 
-from sage.functions.log import exp
+from itertools import product
+
 from sage.functions.other import ceil
 from sage.rings.real_mpfr import RealField
 from sage.rings.real_mpfr import RR
@@ -69,17 +70,16 @@ from sage.modules.free_module import FreeModule
 from sage.modules.free_module_element import vector
 
 
-def _iter_vectors(n, lower, upper, step=None):
+def _iter_vectors(n, lower, upper):
     r"""
     Iterate over all integer vectors of length ``n`` between ``lower`` and
-    ``upper`` bound.
+    ``upper`` bound, as tuples.
 
     INPUT:
 
     - ``n`` - length, integer ``>0``,
     - ``lower`` - lower bound (inclusive), integer ``< upper``.
     - ``upper`` - upper bound (exclusive), integer ``> lower``.
-    - ``step`` - used for recursion, ignore.
 
     EXAMPLES::
 
@@ -88,25 +88,15 @@ def _iter_vectors(n, lower, upper, step=None):
       [(-1, -1), (0, -1), (1, -1), (-1, 0), (0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
 
     """
-    if step is None:
-        if ZZ(lower) >= ZZ(upper):
-            raise ValueError("Expected lower < upper, but got %d >= %d" % (lower, upper))
-        if ZZ(n) <= 0:
-            raise ValueError("Expected n>0 but got %d <= 0" % n)
-        step = n
-
-    assert(step > 0)
-    if step == 1:
-        for x in range(lower, upper):
-            v = vector(ZZ, n)
-            v[0] = x
-            yield v
-        return
-    else:
-        for x in range(lower, upper):
-            for v in _iter_vectors(n, lower, upper, step - 1):
-                v[step - 1] = x
-                yield v
+    if ZZ(lower) >= ZZ(upper):
+        raise ValueError("Expected lower < upper, but got %d >= %d" % (lower, upper))
+    if ZZ(n) <= 0:
+        raise ValueError("Expected n>0 but got %d <= 0" % n)
+
+    # ``product`` varies the last coordinate fastest, while we enumerate with
+    # the first coordinate varying fastest, hence the reversal.
+    for t in product(range(lower, upper), repeat=n):
+        yield t[::-1]
 
 
 class DiscreteGaussianDistributionLatticeSampler(SageObject):
@@ -229,14 +219,21 @@ class DiscreteGaussianDistributionLatticeSampler(SageObject):
 
             sage: while abs(m*f(v)*1.0/c/counter[v] - 1.0) >= 0.2: add_samples(1000)  # long time
         """
-        if self.B != identity_matrix(ZZ, self.B.nrows()):
+        if self.B != identity_matrix(ZZ, self._m):
             raise NotImplementedError("This function is only implemented when B is an identity matrix.")
 
-        f = self.f
-        n = self.B.ncols()
+        n = self._n
         sigma = self._sigma
-        return sum(f(x) for x in _iter_vectors(n, -ceil(tau * sigma),
-                                               ceil(tau * sigma)))
+        T = ceil(tau * sigma)
+        if self._c.is_zero():
+            # For c = 0 the sum over the box factors into a product of
+            # identical one-dimensional sums, so only O(τσ) terms are needed
+            # instead of O((τσ)^n).
+            two_sigma2 = 2 * sigma ** 2
+            return sum((-(ZZ(k) ** 2) / two_sigma2).exp()
+                       for k in range(-T, T)) ** n
+        f = self.f
+        return sum(f(x) for x in _iter_vectors(n, -T, T))
 
     def __init__(self, B, sigma=1, c=None, precision=None):
         r"""
@@ -310,39 +307,66 @@ class DiscreteGaussianDistributionLatticeSampler(SageObject):
             pass
 
         self.B = B
+        self._m = B.nrows()
+        self._n = B.ncols()
+        self._B_is_identity = B == 1
         self._G = B.gram_schmidt()[0]
 
         try:
-            c = vector(ZZ, B.ncols(), c)
+            c = vector(ZZ, self._n, c)
         except TypeError:
             try:
-                c = vector(QQ, B.ncols(), c)
+                c = vector(QQ, self._n, c)
             except TypeError:
-                c = vector(RR, B.ncols(), c)
+                c = vector(RR, self._n, c)
 
         self._c = c
 
-        self.f = lambda x: exp(-(vector(ZZ, B.ncols(), x) - c).norm() ** 2 / (2 * self._sigma ** 2))
+        n = self._n
+        two_sigma2 = 2 * self._sigma ** 2
+
+        def f(x):
+            x = vector(ZZ, n, x) - c
+            return (-x.dot_product(x) / two_sigma2).exp()
+
+        self.f = f
 
         # deal with trivial case first, it is common
         if self._G == 1 and self._c == 0:
             self._c_in_lattice = True
             D = DiscreteGaussianDistributionIntegerSampler(sigma=sigma)
-            self.D = tuple([D for _ in range(self.B.nrows())])
-            self.VS = FreeModule(ZZ, B.nrows())
+            self.D = tuple([D for _ in range(self._m)])
+            self.VS = FreeModule(ZZ, self._m)
             return
 
-        w = B.solve_left(c)
-        if w in ZZ ** B.nrows():
+        # the coordinates of c w.r.t. B; for identity and diagonal bases
+        # they can be read off without a full rational solve
+        if self._B_is_identity:
+            w = c
+        elif (B.is_square() and B.is_diagonal()
+              and all(B[i, i] for i in range(self._m))):
+            w = vector([c[i] / B[i, i] for i in range(self._m)])
+        else:
+            w = B.solve_left(c)
+        if w in ZZ ** self._m:
             self._c_in_lattice = True
             D = []
-            for i in range(self.B.nrows()):
+            for i in range(self._m):
                 sigma_ = self._sigma / self._G[i].norm()
                 D.append(DiscreteGaussianDistributionIntegerSampler(sigma=sigma_))
             self.D = tuple(D)
-            self.VS = FreeModule(ZZ, B.nrows())
+            self.VS = FreeModule(ZZ, self._m)
         else:
             self._c_in_lattice = False
+            # loop invariants of _call; computing them per sample would
+            # repeat O(m) field operations on every draw
+            self._G_rows = self._G.rows()
+            self._G_norm2 = [b_.dot_product(b_) for b_ in self._G_rows]
+            self._G_norm = [b_.norm() for b_ in self._G_rows]
+            self._B_rows = B.rows()
+            for b_ in self._G_norm:
+                assert self._sigma / b_ > 0
+            self._D_cache = {}
 
     def __call__(self):
         r"""
@@ -442,6 +466,10 @@ class DiscreteGaussianDistributionLatticeSampler(SageObject):
            Do not call this method directly, call :func:`DiscreteGaussianDistributionLatticeSampler.__call__` instead.
         """
         w = self.VS([d() for d in self.D], check=False)
+        if self._B_is_identity:
+            if not self._c:
+                return w
+            return w + self._c
         return w * self.B + self._c
 
     def _call(self):
@@ -462,16 +490,21 @@ class DiscreteGaussianDistributionLatticeSampler(SageObject):
            Do not call this method directly, call :func:`DiscreteGaussianDistributionLatticeSampler.__call__` instead.
         """
         v = 0
-        c, sigma, B = self._c, self._sigma, self.B
+        c, sigma, B = self._c, self._sigma, self._B_rows
 
-        m = self.B.nrows()
+        m = self._m
 
         for i in range(m - 1, -1, -1):
-            b_ = self._G[i]
-            c_ = c.dot_product(b_) / b_.dot_product(b_)
-            sigma_ = sigma / b_.norm()
-            assert(sigma_ > 0)
-            z = DiscreteGaussianDistributionIntegerSampler(sigma=sigma_, c=c_, algorithm="uniform+online")()
-            c = c - z * B[i]
-            v = v + z * B[i]
+            b_ = self._G_rows[i]
+            c_ = c.dot_product(b_) / self._G_norm2[i]
+            D = self._D_cache.get((i, c_))
+            if D is None:
+                sigma_ = sigma / self._G_norm[i]
+                D = DiscreteGaussianDistributionIntegerSampler(sigma=sigma_, c=c_, algorithm="uniform+online")
+                if len(self._D_cache) < 4096:
+                    self._D_cache[(i, c_)] = D
+            z = D()
+            t = z * B[i]
+            c = c - t
+            v = v + t
         return v